@@ -0,0 +1,95 @@
+"""
+Local City Gazetteer
+
+Read-only SQLite lookup of common city names, consulted before Nominatim so
+hot origins like "Berlin" resolve without a network round-trip.
+
+Build the database from a GeoNames dump
+(https://download.geonames.org/export/dump/cities15000.zip):
+
+    python gazetteer.py cities15000.txt cities.sqlite
+
+Set GAZETTEER_PATH to use a different file. If the file is missing, lookups
+return None and geocoding falls through to Nominatim.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from typing import Optional, Tuple
+
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.sqlite")
+)
+
+_conn: Optional[sqlite3.Connection] = None
+_opened = False
+_lock = threading.Lock()
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    global _conn, _opened
+    if _opened:
+        return _conn
+    _opened = True
+    if not os.path.exists(GAZETTEER_PATH):
+        return None
+    # immutable: no locking or journal reads, and the file is memory-mapped,
+    # so every worker process shares the same page-cache pages
+    _conn = sqlite3.connect(f"file:{GAZETTEER_PATH}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+    _conn.execute("PRAGMA mmap_size = 268435456")
+    return _conn
+
+
+def lookup_city(query: str) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of the most populous city named exactly `query`, if any"""
+    name = query.strip()
+    if not name:
+        return None
+    with _lock:
+        conn = _connect()
+        if conn is None:
+            return None
+        # Quoted as an FTS5 phrase so user input is never parsed as query syntax;
+        # the equality check drops partial matches ("York" vs "New York")
+        row = conn.execute(
+            "SELECT lat, lon FROM cities_fts WHERE name MATCH ? AND name = ? COLLATE NOCASE "
+            "ORDER BY population DESC LIMIT 1",
+            ('"' + name.replace('"', '""') + '"', name),
+        ).fetchone()
+    if row is None:
+        return None
+    return float(row[0]), float(row[1])
+
+
+def build(src: str, dest: str) -> None:
+    """Import a GeoNames cities TSV into a fresh FTS5 database at dest"""
+    tmp = dest + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.execute(
+        "CREATE VIRTUAL TABLE cities_fts USING fts5(name, lat UNINDEXED, lon UNINDEXED, population UNINDEXED)"
+    )
+    rows = []
+    with open(src, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            # GeoNames columns: 1 name, 2 asciiname, 4 latitude, 5 longitude, 14 population
+            name, ascii_name = cols[1], cols[2]
+            lat, lon, population = float(cols[4]), float(cols[5]), int(cols[14] or 0)
+            rows.append((name, lat, lon, population))
+            if ascii_name and ascii_name != name:
+                rows.append((ascii_name, lat, lon, population))
+    conn.executemany("INSERT INTO cities_fts VALUES (?, ?, ?, ?)", rows)
+    conn.execute("INSERT INTO cities_fts(cities_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+    os.replace(tmp, dest)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python gazetteer.py cities15000.txt cities.sqlite")
+    build(sys.argv[1], sys.argv[2])
@@ -1,14 +1,38 @@
 import os
-from typing import List, Optional, Dict, Any
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from typing import List, Optional, Dict, Any, Tuple
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-import networkx as nx
-from database import db, create_document, get_documents
-
-app = FastAPI(title="EV Charging Optimizer API")
+from cachetools import TTLCache
+import httpx
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from rtree import index as rtree_index
+try:
+    from numba import njit
+except ImportError:  # NumPy kernel below is used instead
+    njit = None
+from database import db, async_db, create_document, get_documents_async
+from gazetteer import lookup_city
+
+logger = logging.getLogger(__name__)
+
+# Worker processes. Each keeps its own station cache (a POST only invalidates
+# the worker that served it; others stay stale for up to STATIONS_TTL_SECONDS)
+# and its own Nominatim throttle, so more than one is opt-in
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+app = FastAPI(title="EV Charging Optimizer API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +41,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Station listings are repetitive JSON; compress anything past a small payload
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 # -----------------------------
 # Models
@@ -24,8 +50,8 @@ app.add_middleware(
 class Station(BaseModel):
     id: Optional[str] = None
     name: str
-    latitude: float
-    longitude: float
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
     charger_type: str = Field(description="e.g., CCS, CHAdeMO, Type2")
     power_kw: float = 50
     price_per_kwh: Optional[float] = None
@@ -34,7 +60,7 @@ class Station(BaseModel):
 
 class OptimizeRequest(BaseModel):
     origin: str
-    max_distance_km: float = 50
+    max_distance_km: float = Field(50, ge=0)
     preferred_charger: Optional[str] = None
 
 class OptimizeResponse(BaseModel):
@@ -51,28 +77,183 @@ class ChatMessage(BaseModel):
 # -----------------------------
 # Utilities
 # -----------------------------
-geolocator = Nominatim(user_agent="ev_optimizer")
-
+# Pooled client: keep-alive connections to Nominatim are reused across requests
+_HTTPX = httpx.AsyncClient(
+    base_url="https://nominatim.openstreetmap.org",
+    headers={"User-Agent": "ev_optimizer"},
+    timeout=5.0,
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20),
+)
 
-def geocode_address(query: str) -> Optional[Dict[str, float]]:
-    try:
-        loc = geolocator.geocode(query)
-        if not loc:
-            return None
-        return {"lat": float(loc.latitude), "lon": float(loc.longitude)}
-    except Exception:
+# Successful lookups keyed by normalized query; failures are not cached so
+# a transient Nominatim error does not stick for a day
+_GEOCODE_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=86400)
+_GEOCODE_LOCK = threading.Lock()
+
+
+# Nominatim's usage policy allows about one request per second per client.
+# The throttle is per process, so each worker waits for its share
+NOMINATIM_MIN_DELAY_SECONDS = 1.0 * WEB_CONCURRENCY
+NOMINATIM_MAX_RETRIES = 2
+NOMINATIM_ERROR_WAIT_SECONDS = 2.0
+_nominatim_next_slot = 0.0
+_NOMINATIM_LOCK = asyncio.Lock()
+
+
+async def _nominatim_throttle() -> None:
+    """Wait for this call's turn; concurrent callers queue one slot apart"""
+    global _nominatim_next_slot
+    async with _NOMINATIM_LOCK:
+        now = time.monotonic()
+        slot = max(now, _nominatim_next_slot)
+        _nominatim_next_slot = slot + NOMINATIM_MIN_DELAY_SECONDS
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
+async def nominatim_search(query: str) -> Optional[Tuple[float, float]]:
+    for attempt in range(NOMINATIM_MAX_RETRIES + 1):
+        try:
+            await _nominatim_throttle()
+            r = await _HTTPX.get("/search", params={"q": query, "format": "json", "limit": 1})
+            r.raise_for_status()
+            results = r.json()
+            if not results:
+                return None
+            return float(results[0]["lat"]), float(results[0]["lon"])
+        except httpx.HTTPStatusError as e:
+            # Client errors other than 429 (e.g. a 403 ban) will not heal on retry
+            status = e.response.status_code
+            if (400 <= status < 500 and status != 429) or attempt == NOMINATIM_MAX_RETRIES:
+                return None
+            await asyncio.sleep(NOMINATIM_ERROR_WAIT_SECONDS)
+        except Exception:
+            if attempt == NOMINATIM_MAX_RETRIES:
+                return None
+            await asyncio.sleep(NOMINATIM_ERROR_WAIT_SECONDS)
+    return None
+
+
+async def geocode_address(query: str) -> Optional[Dict[str, float]]:
+    key = query.strip().lower()
+    with _GEOCODE_LOCK:
+        cached = _GEOCODE_CACHE.get(key)
+    if cached is not None:
+        return {"lat": cached[0], "lon": cached[1]}
+    # Local gazetteer first; only unknown places go over the network
+    coords = lookup_city(query)
+    if coords is None:
+        coords = await nominatim_search(query)
+    if coords is None:
         return None
+    with _GEOCODE_LOCK:
+        _GEOCODE_CACHE[key] = coords
+    return {"lat": coords[0], "lon": coords[1]}
+
+
+EARTH_RADIUS_KM = 6371.0
 
 
 def haversine_km(a: Dict[str, float], b: Dict[str, float]) -> float:
-    return geodesic((a["lat"], a["lon"]), (b["lat"], b["lon"])).km
+    lat1, lat2 = math.radians(a["lat"]), math.radians(b["lat"])
+    dlat = lat2 - lat1
+    dlon = math.radians(b["lon"] - a["lon"])
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(h, 1.0)))
+
+
+if njit is not None:
+    # Serial on purpose: station counts are too small to amortize a parallel
+    # launch, and a parallel kernel's thread pool hung process shutdown when
+    # first launched off the main thread. Compiled by warm_haversine_kernel()
+    # at startup, since optimize calls it on the event loop
+    @njit(fastmath=True, cache=True)
+    def haversine_batch(lat1_rad, lon1_rad, cos_lat1, lat2_rad, lon2_rad, cos_lat2, out):
+        """Fused great-circle kernel: one pass over the stations, no temporaries"""
+        for i in range(lat2_rad.shape[0]):
+            dlat = lat2_rad[i] - lat1_rad
+            dlon = lon2_rad[i] - lon1_rad
+            a = math.sin(dlat / 2) ** 2 + cos_lat1 * cos_lat2[i] * math.sin(dlon / 2) ** 2
+            out[i] = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+else:
+    # Elements per tile: keeps the ufunc chain's temporaries resident in L2
+    HAVERSINE_TILE = 4096
+
+    def haversine_batch(lat1_rad, lon1_rad, cos_lat1, lat2_rad, lon2_rad, cos_lat2, out):
+        for start in range(0, lat2_rad.shape[0], HAVERSINE_TILE):
+            tile = slice(start, start + HAVERSINE_TILE)
+            a = np.sin((lat2_rad[tile] - lat1_rad) / 2) ** 2 + cos_lat1 * cos_lat2[tile] * np.sin(
+                (lon2_rad[tile] - lon1_rad) / 2
+            ) ** 2
+            np.arcsin(np.sqrt(np.minimum(a, 1.0)), out=out[tile])
+        out *= 2 * EARTH_RADIUS_KM
+
+
+# Output buffer, grown on demand and reused across requests. Optimize runs on
+# the event loop thread, so in practice there is one; thread-local keeps any
+# caller from the threadpool off it
+_DISTANCE_BUFFERS = threading.local()
+
+
+def haversine_batch_km(
+    lat: float, lon: float, lat_rad: np.ndarray, lon_rad: np.ndarray, cos_lat: np.ndarray
+) -> np.ndarray:
+    """Great-circle distance from one point (degrees) to many.
+
+    The targets come precomputed in radians with their latitude cosines, so
+    only the origin is converted per call. Returns a view into this thread's
+    scratch buffer; it is overwritten by the next call on the same thread.
+    """
+    n = lat_rad.shape[0]
+    buf = getattr(_DISTANCE_BUFFERS, "out", None)
+    if buf is None or buf.shape[0] < n:
+        buf = _DISTANCE_BUFFERS.out = np.empty(max(n, 256), dtype=np.float32)
+    out = buf[:n]
+    lat1_rad = math.radians(lat)
+    haversine_batch(lat1_rad, math.radians(lon), math.cos(lat1_rad), lat_rad, lon_rad, cos_lat, out)
+    return out
+
+
+# Collation shared by the filter indexes and the queries that must use them
+CASE_INSENSITIVE = {"locale": "en", "strength": 2}
+
+
+def warm_haversine_kernel() -> None:
+    """Trigger the JIT compile (or cache load) before requests arrive"""
+    empty = np.zeros(1, dtype=np.float32)
+    haversine_batch_km(0.0, 0.0, empty, empty, empty)
+
+
+def station_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Station fields plus the GeoJSON point that backs the 2dsphere index"""
+    doc = dict(data)
+    doc["loc"] = {"type": "Point", "coordinates": [doc["longitude"], doc["latitude"]]}
+    return doc
+
+
+def ensure_station_indexes():
+    if db is None:
+        return
+    # Backfill documents written before the geo field existed
+    db["station"].update_many(
+        {"loc": {"$exists": False}},
+        [{"$set": {"loc": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}],
+    )
+    # Case-insensitive indexes serve the list filters on the stored fields
+    # themselves, so documents written by any client are matched
+    db["station"].create_index("city", collation=CASE_INSENSITIVE)
+    db["station"].create_index("charger_type", collation=CASE_INSENSITIVE)
+    db["station"].create_index([("loc", "2dsphere")])
+    db["station"].create_index([("name", 1), ("city", 1)], unique=True)
 
 
 def ensure_seed_stations():
     if db is None:
         return
-    existing = db["station"].count_documents({})
-    if existing > 0:
+    # Demo data only goes into an empty collection; the metadata count is
+    # cheap and keeps seeds out of (and deleted seeds gone from) real data
+    if db["station"].estimated_document_count() > 0:
         return
     # Minimal, real-world-like seed entries (lat/lon approximate public locations)
     seeds = [
@@ -127,19 +308,140 @@ def ensure_seed_stations():
             "city": "London",
         },
     ]
-    for s in seeds:
-        create_document("station", s)
+    # One idempotent round-trip: if another worker seeds concurrently, each
+    # upsert is a no-op for stations that already exist
+    now = datetime.now(timezone.utc)
+    db["station"].bulk_write(
+        [
+            UpdateOne(
+                {"name": s["name"], "city": s["city"]},
+                {"$setOnInsert": {**station_document(s), "created_at": now, "updated_at": now}},
+                upsert=True,
+            )
+            for s in seeds
+        ],
+        ordered=False,
+    )
+
+
+async def _list_stations_raw(q: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Station documents as stored, with `_id` turned into `id`; no model validation"""
+    if async_db is None:
+        # Fallback in-memory seed if no DB
+        return [
+            {"name": "Sample Station", "latitude": 37.7749, "longitude": -122.4194, "charger_type": "CCS", "power_kw": 100}
+        ]
+    docs = await get_documents_async("station", q or {}, limit=limit, collation=CASE_INSENSITIVE)
+    for d in docs:
+        d["id"] = str(d.pop("_id"))
+    return docs
+
+
+# -----------------------------
+# Station cache
+# -----------------------------
+# Every station plus struct-of-arrays columns and an R-tree over their
+# (lon, lat) points. Refreshed as a whole and swapped in, so readers never
+# see a half-built snapshot.
+STATIONS_TTL_SECONDS = 60
+_STATIONS_CACHE: Dict[str, Any] = {
+    "ts": 0.0,
+    "data": None,
+    "lat_rad": None,
+    "lon_rad": None,
+    "cos_lat": None,
+    "charger_type_code": None,
+    "charger_type_codes": None,
+    "rtree": None,
+}
+_STATIONS_LOCK = asyncio.Lock()
+
+
+async def _build_station_cache() -> Dict[str, Any]:
+    stations = await _list_stations_raw()
+    tree = None
+    if stations:
+        # Bulk-load from a stream; ids are positions in `data`
+        tree = rtree_index.Index(
+            (i, (s["longitude"], s["latitude"], s["longitude"], s["latitude"]), None) for i, s in enumerate(stations)
+        )
+    # Radians and latitude cosines are computed once per refresh, not per request.
+    # float32 keeps ~1 m precision, far below the radius filter, at half the
+    # bandwidth
+    lat_rad = np.radians(np.array([s["latitude"] for s in stations], dtype=np.float64))
+    lon_rad = np.radians(np.array([s["longitude"] for s in stations], dtype=np.float64))
+    # Codes are local to this snapshot: one per distinct lower-cased type, so
+    # free-form types from POST /api/stations can never overflow the column
+    charger_types, charger_type_code = np.unique(
+        np.array([s["charger_type"].lower() for s in stations], dtype=object), return_inverse=True
+    )
+    return {
+        "ts": time.monotonic(),
+        "data": stations,
+        "lat_rad": lat_rad.astype(np.float32),
+        "lon_rad": lon_rad.astype(np.float32),
+        "cos_lat": np.cos(lat_rad).astype(np.float32),
+        "charger_type_code": charger_type_code.astype(np.int32),
+        "charger_type_codes": {t: code for code, t in enumerate(charger_types)},
+        "rtree": tree,
+    }
+
+
+async def get_station_cache() -> Dict[str, Any]:
+    global _STATIONS_CACHE
+    cache = _STATIONS_CACHE
+    if cache["data"] is not None and time.monotonic() - cache["ts"] < STATIONS_TTL_SECONDS:
+        return cache
+    async with _STATIONS_LOCK:
+        # Another request may have refreshed while we waited
+        cache = _STATIONS_CACHE
+        if cache["data"] is None or time.monotonic() - cache["ts"] >= STATIONS_TTL_SECONDS:
+            cache = _STATIONS_CACHE = await _build_station_cache()
+    return cache
+
+
+def invalidate_station_cache() -> None:
+    _STATIONS_CACHE["ts"] = 0.0
+
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lon, min_lat, max_lon, max_lat) box that contains every point within radius_km"""
+    dlat = radius_km / 111.0
+    lat_lo, lat_hi = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # Degrees of longitude shrink towards the poles; size the box at its poleward edge
+    cos_edge = math.cos(math.radians(max(abs(lat_lo), abs(lat_hi))))
+    dlon = radius_km / (111.0 * cos_edge) if cos_edge > 1e-9 else 360.0
+    if lon - dlon < -180.0 or lon + dlon > 180.0:
+        # Box wraps the antimeridian or covers a pole; search every longitude
+        return (-180.0, lat_lo, 180.0, lat_hi)
+    return (lon - dlon, lat_lo, lon + dlon, lat_hi)
 
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
+    warm_haversine_kernel()
+    # Independent steps: seeding must still run if an index cannot be built
+    # (e.g. the unique (name, city) index over pre-existing duplicates)
+    try:
+        ensure_station_indexes()
+    except Exception:
+        logger.exception("Creating station indexes failed")
     try:
         ensure_seed_stations()
     except Exception:
-        # Database may not be configured; continue without seeding
+        logger.exception("Seeding stations failed")
+    try:
+        await get_station_cache()
+    except Exception:
+        # Built lazily on the first optimize call instead
         pass
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await _HTTPX.aclose()
+
+
 @app.get("/")
 def read_root():
     return {"message": "EV Charging Optimizer Backend"}
@@ -173,80 +475,87 @@ def test_database():
 
 
 @app.get("/api/geocode")
-def api_geocode(q: str = Query(..., description="Address or place to geocode")):
-    coords = geocode_address(q)
+async def api_geocode(q: str = Query(..., description="Address or place to geocode")):
+    coords = await geocode_address(q)
     if not coords:
         raise HTTPException(status_code=404, detail="Location not found")
     return coords
 
 
 @app.get("/api/stations", response_model=List[Station])
-def list_stations(city: Optional[str] = None, charger: Optional[str] = None):
-    if db is None:
-        # Fallback in-memory seed if no DB
-        data = [
-            Station(name="Sample Station", latitude=37.7749, longitude=-122.4194, charger_type="CCS", power_kw=100)
-        ]
-        return data
+async def list_stations(city: Optional[str] = None, charger: Optional[str] = None):
+    if not city and not charger:
+        return (await get_station_cache())["data"][:200]
     q: Dict[str, Any] = {}
     if city:
-        q["city"] = {"$regex": f"^{city}$", "$options": "i"}
+        q["city"] = city
     if charger:
-        q["charger_type"] = {"$regex": f"^{charger}$", "$options": "i"}
-    docs = get_documents("station", q, limit=200)
-    results: List[Station] = []
-    for d in docs:
-        d["id"] = str(d.get("_id"))
-        d.pop("_id", None)
-        results.append(Station(**d))
-    return results
+        q["charger_type"] = charger
+    # Plain documents: response_model validates them once on the way out
+    return await _list_stations_raw(q, limit=200)
+
+
+@app.post("/api/stations", response_model=Station)
+def add_station(station: Station):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    try:
+        station.id = create_document("station", station_document(station.model_dump(exclude={"id"})))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Station with this name already exists in this city")
+    invalidate_station_cache()
+    return station
 
 
 @app.post("/api/optimize", response_model=OptimizeResponse)
-def optimize_route(req: OptimizeRequest):
-    origin_coords = geocode_address(req.origin)
+async def optimize_route(req: OptimizeRequest):
+    # Geocoding and a possible station refresh are both I/O; overlap them
+    origin_coords, snapshot = await asyncio.gather(geocode_address(req.origin), get_station_cache())
     if not origin_coords:
         raise HTTPException(status_code=404, detail="Origin not found")
 
-    # Fetch stations
-    stations = list_stations()
+    stations: List[Dict[str, Any]] = snapshot["data"]
+    tree = snapshot["rtree"]
+    allowed = np.ones(len(stations), dtype=bool)
     if req.preferred_charger:
-        stations = [s for s in stations if s.charger_type.lower() == req.preferred_charger.lower()]
-    if not stations:
+        code = snapshot["charger_type_codes"].get(req.preferred_charger.lower(), -1)
+        allowed = snapshot["charger_type_code"] == code
+    if not allowed.any():
         raise HTTPException(status_code=404, detail="No stations available for the given filter")
 
-    # Filter by distance and build candidate list
-    candidates: List[Dict[str, Any]] = []
-    for s in stations:
-        d_km = haversine_km(origin_coords, {"lat": s.latitude, "lon": s.longitude})
-        if d_km <= req.max_distance_km:
-            candidates.append({"station": s, "distance_km": d_km})
-
-    if not candidates:
-        # pick globally nearest if none within radius
-        stations_with_dist = [
-            {"station": s, "distance_km": haversine_km(origin_coords, {"lat": s.latitude, "lon": s.longitude})}
-            for s in stations
-        ]
-        candidates = sorted(stations_with_dist, key=lambda x: x["distance_km"])[:5]
-    else:
-        candidates = sorted(candidates, key=lambda x: x["distance_km"])[:5]
-
-    # Simple graph with origin and candidates fully connected using distance as weight
-    G = nx.Graph()
-    G.add_node("origin", **origin_coords)
-    for idx, c in enumerate(candidates):
-        s = c["station"]
-        G.add_node(s.name, lat=s.latitude, lon=s.longitude)
-        # connect origin to station
-        G.add_edge(
-            "origin",
-            s.name,
-            weight=c["distance_km"],
+    # Filter: stations inside the bounding box, via the R-tree
+    olat, olon = origin_coords["lat"], origin_coords["lon"]
+    bbox = bbox_around(olat, olon, req.max_distance_km)
+    ids = np.fromiter(tree.intersection(bbox), dtype=np.intp)
+    ids = ids[allowed[ids]]
+    # Refine: exact great-circle distance on the survivors only
+    d_km = haversine_batch_km(
+        olat, olon, snapshot["lat_rad"][ids], snapshot["lon_rad"][ids], snapshot["cos_lat"][ids]
+    )
+    in_radius = d_km <= req.max_distance_km
+    ids, d_km = ids[in_radius], d_km[in_radius]
+
+    if ids.size == 0:
+        # pick globally nearest if none within radius; an exact scan over every
+        # allowed station, since R-tree nearest ranks in degrees and misses
+        # neighbours across the antimeridian or at high latitudes
+        ids = np.flatnonzero(allowed)
+        d_km = haversine_batch_km(
+            olat, olon, snapshot["lat_rad"][ids], snapshot["lon_rad"][ids], snapshot["cos_lat"][ids]
         )
-    # Best path is simply the minimum weight edge here
-    best = min(candidates, key=lambda x: x["distance_km"])  # Dijkstra trivial on star graph
-    best_station: Station = best["station"]
+
+    # O(n) selection of the k nearest, then sort only those k
+    k = min(5, ids.size)
+    top = np.argpartition(d_km, k - 1)[:k]
+    top = top[np.argsort(d_km[top])]
+    candidates: List[Dict[str, Any]] = [
+        {"station": stations[ids[j]], "distance_km": float(d_km[j])} for j in top
+    ]
+
+    # Candidates are already in distance order
+    best = candidates[0]
+    # The only Station model built per request
+    best_station = Station(**best["station"])
 
     # Build a straight-line polyline from origin to station for visualization
     route_polyline = [
@@ -254,47 +563,77 @@ def optimize_route(req: OptimizeRequest):
         [best_station.latitude, best_station.longitude],
     ]
 
+    # Reported distance for the chosen station, computed at full precision
+    best_distance_km = haversine_km(origin_coords, {"lat": best_station.latitude, "lon": best_station.longitude})
+
     # Rough ETA assuming average 60 km/h
-    eta_minutes = (best["distance_km"] / 60) * 60
-
-    resp = OptimizeResponse(
-        origin=origin_coords,
-        best_station=best_station,
-        distance_km=round(best["distance_km"], 2),
-        eta_minutes=round(eta_minutes, 1),
-        route_polyline=route_polyline,
-        candidates=[
+    eta_minutes = (best_distance_km / 60) * 60
+
+    # Returned as a Response so FastAPI skips re-validating our own data
+    # against OptimizeResponse, which still documents the shape
+    return ORJSONResponse({
+        "origin": origin_coords,
+        "best_station": best_station.model_dump(),
+        "distance_km": round(best_distance_km, 2),
+        "eta_minutes": round(eta_minutes, 1),
+        "route_polyline": route_polyline,
+        "candidates": [
             {
-                "name": c["station"].name,
-                "latitude": c["station"].latitude,
-                "longitude": c["station"].longitude,
+                "name": c["station"]["name"],
+                "latitude": c["station"]["latitude"],
+                "longitude": c["station"]["longitude"],
                 "distance_km": round(c["distance_km"], 2),
-                "charger_type": c["station"].charger_type,
-                "power_kw": c["station"].power_kw,
+                "charger_type": c["station"]["charger_type"],
+                "power_kw": c["station"].get("power_kw", Station.model_fields["power_kw"].default),
             }
             for c in candidates
         ],
-    )
-    return resp
+    })
+
+
+# Intent -> (keywords, reply), in priority order when several intents match
+CHAT_INTENTS: Dict[str, Tuple[List[str], str]] = {
+    "price": (
+        ["price", "cost", "kwh", "pricing"],
+        "Pricing varies by operator and power. Typical public fast charging ranges from $0.20 to $0.80 per kWh. Use the station details to compare.",
+    ),
+    "near": (
+        ["near", "nearest", "close", "around me"],
+        "Enter your location in the search box to see the nearest stations and optimized route.",
+    ),
+    "avail": (
+        ["available", "availability", "busy", "free"],
+        "Live availability depends on operator integrations. This demo shows indicative availability; check operator apps for real-time slots.",
+    ),
+    "route": (
+        ["route", "navigate", "direction"],
+        "Provide your origin address and optional charger preference. The optimizer will pick the best nearby station and draw the route.",
+    ),
+}
+# One alternation with a named group per intent, so a message is scanned once
+INTENT_PATTERN = re.compile(
+    "|".join(f"(?P<{intent}>{'|'.join(map(re.escape, kws))})" for intent, (kws, _) in CHAT_INTENTS.items())
+)
 
 
 @app.post("/api/chat")
 def chatbot(msg: ChatMessage):
     text = msg.message.lower()
-    # Lightweight intent handling to keep runtime lean
-    if any(k in text for k in ["price", "cost", "kwh", "pricing"]):
-        return {
-            "reply": "Pricing varies by operator and power. Typical public fast charging ranges from $0.20 to $0.80 per kWh. Use the station details to compare."}
-    if any(k in text for k in ["near", "nearest", "close", "around me"]):
-        return {"reply": "Enter your location in the search box to see the nearest stations and optimized route."}
-    if any(k in text for k in ["available", "availability", "busy", "free"]):
-        return {"reply": "Live availability depends on operator integrations. This demo shows indicative availability; check operator apps for real-time slots."}
-    if any(k in text for k in ["route", "navigate", "direction"]):
-        return {"reply": "Provide your origin address and optional charger preference. The optimizer will pick the best nearby station and draw the route."}
+    found = {m.lastgroup for m in INTENT_PATTERN.finditer(text)}
+    for intent, (_, reply) in CHAT_INTENTS.items():
+        if intent in found:
+            return {"reply": reply}
     return {"reply": "I can help you find nearby charging stations, pricing info, and route guidance. Ask me about 'nearest station', 'pricing', or 'availability'."}
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=WEB_CONCURRENCY,
+    )